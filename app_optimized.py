@@ -1,8 +1,7 @@
 import streamlit as st
-import pandas as pd
 import joblib
-import plotly.express as px
-import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -12,8 +11,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- CUSTOM CSS ---
-st.markdown("""
+# --- STATIC MARKUP ---
+# CSS and header are emitted in a single call so each rerun sends one
+# element instead of four.
+_STATIC_HTML = """
     <style>
     .main {
         background-color: #f8f9fa;
@@ -50,6 +51,16 @@ st.markdown("""
         font-weight: 800;
         margin: 0;
     }
+    .landing-grid {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+        gap: 1rem;
+    }
+    @media (max-width: 640px) {
+        .landing-grid {
+            grid-template-columns: 1fr;
+        }
+    }
     .safety-tip {
         background-color: #e3f2fd;
         padding: 15px;
@@ -59,28 +70,93 @@ st.markdown("""
         color: black;
     }
     </style>
-    """, unsafe_allow_html=True)
+    <h1>🛡️ DC Crime Insight</h1>
+    <p><strong>AI-Powered Safety &amp; Risk Assessment Tool</strong></p>
+    <hr>
+    """
+
+_LANDING_HTML = """
+    <div class="landing-grid">
+        <div>
+            <h3>🗺️ Select Area</h3>
+            <p>Choose from DC's neighborhood clusters to pinpoint the analysis.</p>
+        </div>
+        <div>
+            <h3>⏰ Set Time</h3>
+            <p>Crime trends change by hour and season. Input specific times for accuracy.</p>
+        </div>
+        <div>
+            <h3>🔍 Get Insights</h3>
+            <p>Our AI analyzes historical patterns to predict the most likely risks.</p>
+        </div>
+    </div>
+    <hr>
+    """
+
+st.markdown(_STATIC_HTML, unsafe_allow_html=True)
+
+# --- SAFETY TIPS ---
+_THEFT_TIP = "🔒 **Tip:** Ensure your vehicle is locked and valuables are out of sight. Avoid leaving bags unattended."
+_TIPS = {
+    "THEFT/OTHER": _THEFT_TIP,
+    "THEFT F/AUTO": _THEFT_TIP,
+    "MOTOR VEHICLE THEFT": _THEFT_TIP,
+    "ROBBERY": "👀 **Tip:** Stay in well-lit areas. Avoid using your phone while walking alone at night.",
+    "ASSAULT W/DANGEROUS WEAPON": "🏃 **Tip:** Travel in groups if possible. Trust your instincts and avoid conflict.",
+}
+_DEFAULT_TIP = "Stay alert and keep valuables hidden."
 
 # --- LOAD RESOURCES ---
 @st.cache_resource
 def load_resources():
     try:
-        model = joblib.load("optimized_model.pkl")
-        options = joblib.load("app_options.pkl")
-        return model, options
+        precomputed = joblib.load("precomputed.pkl")
+        # The table is indexed by position in these lists, so they are saved
+        # in the same file.
+        return precomputed["options"], precomputed
     except FileNotFoundError:
         st.error("⚠️ Files not found! Please run 'train_optimized.py' first.")
         st.stop()
 
-model, options = load_resources()
+options, precomputed = load_resources()
+
+cluster_idx = {c: i for i, c in enumerate(options["clusters"])}
+day_idx = {d: i for i, d in enumerate(options["days"])}
+month_idx = {m: i for i, m in enumerate(options["months"])}
 
-# --- HEADER ---
-st.title("🛡️ DC Crime Insight")
-st.markdown("**AI-Powered Safety & Risk Assessment Tool**")
-st.markdown("---")
+# --- PREDICTION ---
+def predict(cluster, hour, day, month):
+    probs = precomputed["probs"][cluster_idx[cluster], hour, day_idx[day], month_idx[month]]
+    classes = precomputed["classes"]
+    best = probs.argmax()
+    return str(classes[best]), probs[best] * 100, probs, classes
+
+# --- CHART ---
+_CHART_LAYOUT = dict(
+    title="📊 Probability Breakdown by Crime Type",
+    height=400,
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    xaxis_title="Likelihood (%)", 
+    yaxis_title=None,
+    font=dict(family="Arial", size=14)
+)
+
+# Plotly lazy-imports its property validators and JSON encoder on the first
+# figure, which would otherwise stall the first click. Pay that once per
+# process with a throwaway figure.
+@st.cache_resource
+def warm_plotly():
+    pio.to_json(go.Figure(go.Bar(), layout=_CHART_LAYOUT), validate=False)
+
+warm_plotly()
 
 # --- SIDEBAR ---
-with st.sidebar:
+# Runs as a fragment so dragging the slider or changing a selectbox only
+# reruns the sidebar. The main pane is rerun once "Analyze Risk" is pressed,
+# with the selection snapshotted into session state.
+@st.fragment
+def sidebar():
     st.header("⚙️ Configuration")
     
     st.subheader("📍 Location")
@@ -96,30 +172,23 @@ with st.sidebar:
     selected_hour = st.slider("Hour of Day (24h)", 0, 23, 12, format="%d:00")
 
     st.markdown("---")
-    predict_btn = st.button("Analyze Risk 🚀")
+    if st.button("Analyze Risk 🚀"):
+        st.session_state["query"] = (selected_cluster, selected_hour, selected_day, selected_month)
+        st.rerun()
+
+with st.sidebar:
+    sidebar()
 
 # --- MAIN CONTENT ---
-if predict_btn:
-    # 1. Prepare Input
-    input_data = pd.DataFrame([{
-        "NEIGHBORHOOD_CLUSTER": selected_cluster,
-        "HOUR_OF_DAY": selected_hour,
-        "DAY_OF_WEEK": selected_day,
-        "MONTH_NAME": selected_month
-    }])
-
-    # 2. Get Prediction
-    prediction = model.predict(input_data)[0]
-    probs = model.predict_proba(input_data)[0]
-    classes = model.classes_
-
-    # 3. Layout Results
+if "query" in st.session_state:
+    # 1. Get Prediction
+    prediction, max_prob, probs, classes = predict(*st.session_state["query"])
+
+    # 2. Layout Results
     col1, col2 = st.columns([1, 2])
 
     with col1:
         # High-Impact Metric Card
-        max_prob = np.max(probs) * 100
-        
         st.markdown(f"""
         <div class="metric-container">
             <div class="prediction-title">⚠️ Primary Risk</div>
@@ -129,57 +198,25 @@ if predict_btn:
         """, unsafe_allow_html=True)
 
         # Dynamic Safety Tips
-        tip = "Stay alert and keep valuables hidden."
-        if "THEFT" in prediction:
-            tip = "🔒 **Tip:** Ensure your vehicle is locked and valuables are out of sight. Avoid leaving bags unattended."
-        elif "ROBBERY" in prediction:
-            tip = "👀 **Tip:** Stay in well-lit areas. Avoid using your phone while walking alone at night."
-        elif "ASSAULT" in prediction:
-            tip = "🏃 **Tip:** Travel in groups if possible. Trust your instincts and avoid conflict."
-        
+        tip = _TIPS.get(prediction, _DEFAULT_TIP)
         st.markdown(f'<div class="safety-tip">{tip}</div>', unsafe_allow_html=True)
 
     with col2:
         # Plotly Chart
-        risk_df = pd.DataFrame({
-            "Crime Type": classes,
-            "Probability": probs * 100
-        }).sort_values(by="Probability", ascending=True)
-
-        fig = px.bar(
-            risk_df, 
-            x="Probability", 
-            y="Crime Type", 
+        order = precomputed["order"]
+        fig = go.Figure(go.Bar(
+            x=probs[order] * 100,
+            y=classes[order],
             orientation='h',
-            title="📊 Probability Breakdown by Crime Type",
-            text_auto='.1f',
-            height=400
-        )
-        fig.update_traces(marker_color='#ff4b4b', textfont_size=12)
-        fig.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis_title="Likelihood (%)", 
-            yaxis_title=None,
-            font=dict(family="Arial", size=14)
-        )
+            marker_color='#ff4b4b',
+            texttemplate='%{x:.1f}',
+            textfont_size=12
+        ), layout=_CHART_LAYOUT)
         st.plotly_chart(fig, use_container_width=True)
 
 else:
     # --- LANDING PAGE (Replaces the broken image) ---
     st.subheader("Welcome to Crime Insight")
     st.info("👈 **Start by selecting a Neighborhood and Time on the sidebar.**")
-    
-    col_a, col_b, col_c = st.columns(3)
-    with col_a:
-        st.markdown("### 🗺️ Select Area")
-        st.write("Choose from DC's neighborhood clusters to pinpoint the analysis.")
-    with col_b:
-        st.markdown("### ⏰ Set Time")
-        st.write("Crime trends change by hour and season. Input specific times for accuracy.")
-    with col_c:
-        st.markdown("### 🔍 Get Insights")
-        st.write("Our AI analyzes historical patterns to predict the most likely risks.")
-    
-    st.markdown("---")
+    st.markdown(_LANDING_HTML, unsafe_allow_html=True)
     st.caption("Disclaimer: This tool uses historical data for educational purposes and does not predict future events with certainty.")